@@ -1,35 +1,91 @@
+import functools
+import weakref
+from operator import attrgetter, ge, gt, le, lt
+
+import numpy
 import sympy
 import re
 
+try:
+    # symengine parses and manipulates expressions an order of magnitude faster than sympy
+    # and exposes the same interface for the operations used here
+    import symengine as _symbolic
+except ImportError:
+    _symbolic = sympy
+
 from pyxadd.errors import UnexpectedTypeError
 
 
+@functools.lru_cache(maxsize=8192)
+def _sympify_cached(expression_string):
+    """
+    Caches parsed expressions by their string form; parsing is the most expensive step when
+    tests are built from templated strings
+    :type expression_string: str
+    """
+    return _symbolic.sympify(expression_string)
+
+
+@functools.lru_cache(maxsize=4096)
+def _compile_cached(lhs_string, symbol, rhs_string):
+    """
+    Caching front-end for Operator.compile, keyed on the string form of both sides.
+    Tests are typically constructed many times from the same (lhs, symbol, rhs) triple and the
+    sympy manipulation in Operator.compile dominates construction cost.
+    :type lhs_string: str
+    :type symbol: str
+    :type rhs_string: str
+    :rtype: Operator
+    """
+    return Operator.compile(_sympify_cached(lhs_string), symbol, _sympify_cached(rhs_string))
+
+
+_operator_intern = weakref.WeakValueDictionary()
+_test_intern = weakref.WeakValueDictionary()
+
+
 class Operator:
 
-    constructors = {
-        ">": lambda lhs, rhs: GreaterThan(lhs, rhs),
-        "<": lambda lhs, rhs: LessThan(lhs, rhs),
-        ">=": lambda lhs, rhs: GreaterThanEqual(lhs, rhs),
-        "<=": lambda lhs, rhs: LessThanEqual(lhs, rhs),
-    }
+    __slots__ = ("_symbol", "_lhs", "_rhs", "_hash_code", "_canonical", "_negation",
+                 "_batch_cache", "__weakref__")
+
+    # Filled in below, once the concrete operator classes exist
+    constructors = {}
+
+    @staticmethod
+    def _lhs_tuple(lhs):
+        """
+        Normalizes the given coefficients (dict or key-sorted tuple of pairs) to tuple form
+        """
+        return lhs if isinstance(lhs, tuple) else tuple(sorted(lhs.items()))
+
+    def __new__(cls, lhs, rhs):
+        key = (cls, Operator._lhs_tuple(lhs), rhs)
+        operator = _operator_intern.get(key)
+        if operator is None:
+            operator = super(Operator, cls).__new__(cls)
+            _operator_intern[key] = operator
+        return operator
 
     def __init__(self, symbol, lhs, rhs):
+        if hasattr(self, "_symbol"):
+            # Interned instance that has already been initialized
+            return
         self._symbol = symbol
-        self._lhs = lhs
+        self._lhs = Operator._lhs_tuple(lhs)
         self._rhs = rhs + 0
-        self._hash_code = None
+        # Interning means this runs once per distinct operator, so hash eagerly
+        self._hash_code = hash((symbol, self._lhs, self._rhs))
+        self._canonical = None
+        self._negation = None
+        self._batch_cache = None
 
-    @property
-    def symbol(self):
-        return self._symbol
+    symbol = property(attrgetter("_symbol"))
+    rhs = property(attrgetter("_rhs"))
 
     @property
     def lhs(self):
-        return self._lhs
-
-    @property
-    def rhs(self):
-        return self._rhs
+        return dict(self._lhs)
 
     @property
     def children(self):
@@ -37,11 +93,13 @@ class Operator:
 
     @property
     def variables(self):
-        return list(self.lhs.keys())
+        return [v for v, _ in self._lhs]
 
     def coefficient(self, var, force=False):
-        if var in self.lhs:
-            return self.lhs[var]
+        # The coefficient tuple is small (typically 1-3 entries), a scan beats dict hashing
+        for v, c in self._lhs:
+            if v == var:
+                return c
         if not force:
             return 0
         raise RuntimeError("Missing variable {}, only found {}".format(var, self.variables))
@@ -57,6 +115,11 @@ class Operator:
         Return the negation of this operator. E.g. ~(x <= 0) = x > 0
         :return Operator: The negation
         """
+        if self._negation is None:
+            self._negation = self._compute_negation()
+        return self._negation
+
+    def _compute_negation(self):
         raise NotImplementedError()
 
     def flip(self):
@@ -77,15 +140,15 @@ class Operator:
         raise NotImplementedError()
 
     def update_bounds(self, var, lb, ub):
-        if len(self.variables) != 1:
+        if len(self._lhs) != 1:
             raise RuntimeError("Test does not have exactly one variable (it has {})".format(self.variables))
-        rewritten = self.times(1 / self.coefficient(var, force=True))
-        assert isinstance(rewritten, Operator)
+        coefficient = self.coefficient(var, force=True)
         lb = -sympy.oo if lb is None else lb
         ub = sympy.oo if ub is None else ub
-        return rewritten._update_bounds(lb, ub)
+        # Dividing by a negative coefficient flips the comparison, handled by the subclasses
+        return self._update_bounds_scaled(self._rhs / coefficient, lb, ub, coefficient < 0)
 
-    def _update_bounds(self, lb, ub):
+    def _update_bounds_scaled(self, rhs, lb, ub, flipped):
         raise NotImplementedError()
 
     def to_canonical(self):
@@ -93,13 +156,20 @@ class Operator:
         Returns a canonical form of the operator, i.e. rewrites it as a weak inequality (<=)
         :rtype: Operator
         """
+        if self._canonical is None:
+            self._canonical = self._compute_canonical()
+        return self._canonical
+
+    def _compute_canonical(self):
         raise NotImplementedError()
 
     def invert_lhs(self):
-        return {k: -v for k, v in self.lhs.items()}
+        return tuple((k, -v) for k, v in self._lhs)
 
     def times(self, constant):
-        lhs = {k: v * constant for k, v in self.lhs.items()}
+        if constant == 1:
+            return self
+        lhs = tuple((k, v * constant) for k, v in self._lhs)
         rhs = self.rhs * constant
         operator = self if constant >= 0 else self.flip()
         return operator._update(lhs, rhs)
@@ -107,8 +177,9 @@ class Operator:
     def operator_add(self, other):
         assert isinstance(other, Operator)
         assert self.symbol == other.symbol
-        variables = set(self.lhs.keys()) | set(other.lhs.keys())
-        new_coefficients = {var: self.coefficient(var) + other.coefficient(var) for var in variables}
+        new_coefficients = dict(self._lhs)
+        for var, coefficient in other._lhs:
+            new_coefficients[var] = new_coefficients.get(var, 0) + coefficient
         new_coefficients = {var: coefficient for var, coefficient in new_coefficients.items() if coefficient != 0}
         new_constant = self.rhs + other.rhs
         return self._update(new_coefficients, new_constant)
@@ -118,15 +189,44 @@ class Operator:
 
     def evaluate(self, assignment):
         lhs_value = 0
-        for v, c in self.lhs.items():
+        for v, c in self._lhs:
             if v in assignment:
                 lhs_value += assignment[v] * c
             else:
                 raise RuntimeError("Assignment {} did not include all variables required for test {}"
                                    .format(assignment, self))
-        return self.evaluate_values(lhs_value, self.rhs)
+        return self._cmp(lhs_value, self._rhs)
 
     def evaluate_values(self, lhs_value, rhs_value):
+        return self._cmp(lhs_value, rhs_value)
+
+    def prepare_batch(self, var_order):
+        """
+        Returns the coefficient vector for the given variable order and the right hand side.
+        The vector is computed once per variable order and cached on the operator.
+        :type var_order: List[str]|Tuple[str]
+        :rtype: Tuple[numpy.ndarray, float]
+        """
+        var_order = tuple(var_order)
+        if self._batch_cache is None or self._batch_cache[0] != var_order:
+            lhs = dict(self._lhs)
+            coefficients = numpy.fromiter((lhs.get(v, 0.0) for v in var_order),
+                                          dtype=numpy.float64, count=len(var_order))
+            self._batch_cache = (var_order, coefficients)
+        return self._batch_cache[1], self._rhs
+
+    def evaluate_batch(self, assignments, var_order):
+        """
+        Evaluates this operator against a batch of assignments in one vectorized pass
+        :param assignments: An (n, k) array of values, columns ordered according to var_order
+        :param var_order: The variables corresponding to the columns of assignments
+        :return numpy.ndarray: A boolean array of n evaluation results
+        """
+        coefficients, rhs = self.prepare_batch(var_order)
+        assignments = numpy.asarray(assignments, dtype=numpy.float64)
+        return self.evaluate_values_batch(assignments.dot(coefficients), rhs)
+
+    def evaluate_values_batch(self, lhs_values, rhs_value):
         raise NotImplementedError()
 
     def resolve(self, variable, other):
@@ -213,13 +313,13 @@ class Operator:
         return "{} {} {}".format(coefficients, self.symbol, constant)
 
     def __hash__(self):
-        if self._hash_code is None:
-            lhs_tuples = tuple((k, self.lhs[k]) for k in sorted(self.lhs.keys()))
-            self._hash_code = hash((lhs_tuples, self.symbol, self.rhs))
         return self._hash_code
 
     def __eq__(self, other):
-        return isinstance(other, Operator) and self.symbol == other.symbol and self.children == other.children
+        if self is other:
+            return True
+        return isinstance(other, Operator) and self._symbol == other._symbol \
+            and self._lhs == other._lhs and self._rhs == other._rhs
 
     @staticmethod
     def compile(lhs, symbol, rhs):
@@ -230,12 +330,26 @@ class Operator:
         :param rhs: The right hand side expression (sympy expression or number)
         :rtype: Operator
         """
-        expression = lhs - rhs
-        lhs = {str(var): float(expression.coeff(var, 1)) for var in expression.free_symbols}
-        lhs = {var: coefficient for var, coefficient in lhs.items() if coefficient != 0}
-        constant = -sympy.lambdify(expression.free_symbols, expression)(*([0] * len(expression.free_symbols)))
-        # print(constant)
-        rhs = float(constant)
+        # Fast path for the common "symbol <op> constant" case, skipping expression expansion
+        if getattr(lhs, "is_Symbol", False):
+            if isinstance(rhs, (int, float)):
+                return Operator.constructors[symbol]({str(lhs): numpy.float64(1)}, numpy.float64(rhs))
+            if getattr(rhs, "is_Number", False):
+                return Operator.constructors[symbol]({str(lhs): numpy.float64(1)}, numpy.float64(float(rhs)))
+        expression = (lhs - rhs).expand()
+        constant = numpy.float64(0)
+        lhs = {}
+        for term, coefficient in expression.as_coefficients_dict().items():
+            if term == 1:
+                constant = numpy.float64(coefficient)
+            elif term.is_Symbol:
+                # Stored as float64 so the vectorized paths can use the values without boxing
+                coefficient = numpy.float64(coefficient)
+                if coefficient != 0:
+                    lhs[str(term)] = coefficient
+            else:
+                raise RuntimeError("Expression {} is not linear (term {})".format(expression, term))
+        rhs = -constant
         operator = Operator.constructors[symbol](lhs, rhs)
         return operator
 
@@ -243,19 +357,21 @@ class Operator:
         return len(self.variables) == 0
 
     def partial(self, assignment):
-        lhs = dict()
+        if not any(k in assignment for k, _ in self._lhs):
+            return self
+        lhs = []
         rhs = self.rhs
-        for k, v in self.lhs.items():
+        for k, v in self._lhs:
             if k in assignment:
                 rhs -= assignment[k] * v
             else:
-                lhs[k] = v
+                lhs.append((k, v))
 
-        updated = self._update(lhs, rhs)
+        updated = self._update(tuple(lhs), rhs)
         return updated
 
     def rename(self, translation):
-        return self._update({translation[k] if k in translation else k: v for k, v in self._lhs.items()}, self.rhs)
+        return self._update({translation[k] if k in translation else k: v for k, v in self._lhs}, self.rhs)
 
     def substitute_expressions(self, translation):
         for var in self.lhs.keys():
@@ -263,10 +379,12 @@ class Operator:
                 translation[var] = var
         translated = [(coefficient, translation[var]) for var, coefficient in self.lhs.items()]
         expression_string = "+".join("{}*{}".format(coefficient, expression) for coefficient, expression in translated)
-        return self.compile(sympy.sympify(expression_string), self.symbol, self.rhs)
+        return self.compile(_sympify_cached(expression_string), self.symbol, self.rhs)
 
 
 class LessThan(Operator):
+    __slots__ = ()
+
     def __init__(self, lhs, rhs):
         Operator.__init__(self, "<", lhs, rhs)
 
@@ -274,31 +392,37 @@ class LessThan(Operator):
         return self
 
     def weak(self):
-        return LessThanEqual(self.lhs, self.rhs - 1)
+        return LessThanEqual(self._lhs, self._rhs - 1)
 
-    def __invert__(self):
-        return GreaterThanEqual(self.lhs, self.rhs)
+    def _compute_negation(self):
+        return GreaterThanEqual(self._lhs, self._rhs)
 
     def flip(self):
-        return GreaterThan(self.invert_lhs(), -self.rhs)
+        return GreaterThan(self.invert_lhs(), -self._rhs)
 
     def switch_direction(self):
-        return GreaterThan(self.lhs, self.rhs)
+        return GreaterThan(self._lhs, self._rhs)
 
-    def _update_bounds(self, lb, ub):
-        return lb, min(ub, self.rhs - 1)
+    def _update_bounds_scaled(self, rhs, lb, ub, flipped):
+        if flipped:
+            return max(lb, rhs + 1), ub
+        return lb, min(ub, rhs - 1)
 
-    def to_canonical(self):
-        return self.weak()
+    def _compute_canonical(self):
+        return LessThanEqual(self._lhs, self._rhs - 1)
 
-    def evaluate_values(self, lhs_value, rhs_value):
-        return lhs_value < rhs_value
+    _cmp = staticmethod(lt)
+
+    def evaluate_values_batch(self, lhs_values, rhs_value):
+        return numpy.less(lhs_values, rhs_value)
 
     def _update(self, lhs, rhs):
         return LessThan(lhs, rhs)
 
 
 class GreaterThan(Operator):
+    __slots__ = ()
+
     def __init__(self, lhs, rhs):
         Operator.__init__(self, ">", lhs, rhs)
 
@@ -306,95 +430,121 @@ class GreaterThan(Operator):
         return self
 
     def weak(self):
-        return GreaterThanEqual(self.lhs, self.rhs + 1)
+        return GreaterThanEqual(self._lhs, self._rhs + 1)
 
-    def __invert__(self):
-        return LessThanEqual(self.lhs, self.rhs)
+    def _compute_negation(self):
+        return LessThanEqual(self._lhs, self._rhs)
 
     def flip(self):
-        return LessThan(self.invert_lhs(), -self.rhs)
+        return LessThan(self.invert_lhs(), -self._rhs)
 
     def switch_direction(self):
-        return LessThan(self.lhs, self.rhs)
+        return LessThan(self._lhs, self._rhs)
 
-    def _update_bounds(self, lb, ub):
-        return max(lb, self.rhs + 1), ub
+    def _update_bounds_scaled(self, rhs, lb, ub, flipped):
+        if flipped:
+            return lb, min(ub, rhs - 1)
+        return max(lb, rhs + 1), ub
 
-    def to_canonical(self):
-        return self.flip().weak()
+    def _compute_canonical(self):
+        return LessThanEqual(self.invert_lhs(), -(self._rhs + 1))
 
-    def evaluate_values(self, lhs_value, rhs_value):
-        return lhs_value > rhs_value
+    _cmp = staticmethod(gt)
+
+    def evaluate_values_batch(self, lhs_values, rhs_value):
+        return numpy.greater(lhs_values, rhs_value)
 
     def _update(self, lhs, rhs):
         return GreaterThan(lhs, rhs)
 
 
 class LessThanEqual(Operator):
+    __slots__ = ()
+
     def __init__(self, lhs, rhs):
         Operator.__init__(self, "<=", lhs, rhs)
 
     def strict(self):
-        return LessThan(self.lhs, self.rhs + 1)
+        return LessThan(self._lhs, self._rhs + 1)
 
     def weak(self):
         return self
 
-    def __invert__(self):
-        return GreaterThan(self.lhs, self.rhs)
+    def _compute_negation(self):
+        return GreaterThan(self._lhs, self._rhs)
 
     def flip(self):
-        return GreaterThanEqual(self.invert_lhs(), -self.rhs)
+        return GreaterThanEqual(self.invert_lhs(), -self._rhs)
 
     def switch_direction(self):
-        return GreaterThanEqual(self.lhs, self.rhs)
+        return GreaterThanEqual(self._lhs, self._rhs)
 
-    def _update_bounds(self, lb, ub):
-        return lb, min(ub, self.rhs)
+    def _update_bounds_scaled(self, rhs, lb, ub, flipped):
+        if flipped:
+            return max(lb, rhs), ub
+        return lb, min(ub, rhs)
 
-    def to_canonical(self):
+    def _compute_canonical(self):
         return self
 
-    def evaluate_values(self, lhs_value, rhs_value):
-        return lhs_value <= rhs_value
+    _cmp = staticmethod(le)
+
+    def evaluate_values_batch(self, lhs_values, rhs_value):
+        return numpy.less_equal(lhs_values, rhs_value)
 
     def _update(self, lhs, rhs):
         return LessThanEqual(lhs, rhs)
 
 
 class GreaterThanEqual(Operator):
+    __slots__ = ()
+
     def __init__(self, lhs, rhs):
         Operator.__init__(self, ">=", lhs, rhs)
 
     def strict(self):
-        return GreaterThan(self.lhs, self.rhs - 1)
+        return GreaterThan(self._lhs, self._rhs - 1)
 
     def weak(self):
         return self
 
-    def __invert__(self):
-        return LessThan(self.lhs, self.rhs)
+    def _compute_negation(self):
+        return LessThan(self._lhs, self._rhs)
 
     def flip(self):
-        return LessThanEqual(self.invert_lhs(), -self.rhs)
+        return LessThanEqual(self.invert_lhs(), -self._rhs)
 
     def switch_direction(self):
-        return LessThanEqual(self.lhs, self.rhs)
+        return LessThanEqual(self._lhs, self._rhs)
 
-    def _update_bounds(self, lb, ub):
-        return max(lb, self.rhs), ub
+    def _update_bounds_scaled(self, rhs, lb, ub, flipped):
+        if flipped:
+            return lb, min(ub, rhs)
+        return max(lb, rhs), ub
 
-    def to_canonical(self):
-        return self.flip()
+    def _compute_canonical(self):
+        return LessThanEqual(self.invert_lhs(), -self._rhs)
 
-    def evaluate_values(self, lhs_value, rhs_value):
-        return lhs_value >= rhs_value
+    _cmp = staticmethod(ge)
+
+    def evaluate_values_batch(self, lhs_values, rhs_value):
+        return numpy.greater_equal(lhs_values, rhs_value)
 
     def _update(self, lhs, rhs):
         return GreaterThanEqual(lhs, rhs)
 
 
+Operator.constructors = {
+    ">": GreaterThan,
+    "<": LessThan,
+    ">=": GreaterThanEqual,
+    "<=": LessThanEqual,
+}
+
+
 class Test(object):
+    __slots__ = ()
+
     @property
     def variables(self):
         raise NotImplementedError()
@@ -448,32 +598,45 @@ class Test(object):
 
 
 class LinearTest(Test):
+    __slots__ = ("_operator", "_negated", "_bounds_cache", "_hash", "__weakref__")
+
+    def __new__(cls, lhs, symbol=None, rhs=0):
+        operator = lhs if symbol is None else _compile_cached(str(lhs), symbol, str(rhs))
+        test = _test_intern.get(operator)
+        if test is None:
+            test = super(LinearTest, cls).__new__(cls)
+            _test_intern[operator] = test
+        return test
+
     def __init__(self, lhs, symbol=None, rhs=0):
         """
         :type lhs: sympy.Basic|str|int\Operator
         :type symbol: str
         :type rhs: sympy.Basic|str|int
         """
+        if hasattr(self, "_operator"):
+            # Interned instance that has already been initialized
+            return
         if symbol is None:
             operator = lhs
         else:
-            if not isinstance(lhs, sympy.Basic):
-                lhs = sympy.sympify(lhs)
-            if not isinstance(rhs, sympy.Basic):
-                rhs = sympy.sympify(rhs)
-            operator = Operator.compile(lhs, symbol, rhs)
+            operator = _compile_cached(str(lhs), symbol, str(rhs))
 
         self._operator = operator
         self._negated = None
+        self._bounds_cache = None
+        self._hash = hash(operator)
 
-    @property
-    def operator(self):
-        return self._operator
+    operator = property(attrgetter("_operator"))
 
     @property
-    def _negated_operator(self):
+    def negated(self):
+        """
+        The negated operator, constructed on first access only
+        :rtype: Operator
+        """
         if self._negated is None:
-            self._negated = ~self.operator
+            self._negated = ~self._operator
         return self._negated
 
     @property
@@ -485,23 +648,49 @@ class LinearTest(Test):
             raise RuntimeError("Test does not have exactly one variable (it has {})".format(self.operator.variables))
         if var not in self.operator.variables:
             return lb, ub
-        if test:
-            return self.operator.update_bounds(var, lb, ub)
-        else:
-            return self._negated_operator.update_bounds(var, lb, ub)
+        if self._bounds_cache is None:
+            self._bounds_cache = dict()
+        key = (var, lb, ub, test)
+        if key not in self._bounds_cache:
+            operator = self.operator if test else self.negated
+            self._bounds_cache[key] = operator.update_bounds(var, lb, ub)
+        return self._bounds_cache[key]
 
     def evaluate(self, assignment):
         return self.operator.evaluate(assignment)
 
+    def evaluate_batch(self, assignments, var_order):
+        return self.operator.evaluate_batch(assignments, var_order)
+
+    @staticmethod
+    def evaluate_matrix(tests, assignments, var_order):
+        """
+        Evaluates multiple tests against multiple (integer) assignments in one fused pass.
+        Every operator is brought into canonical (<=) form first, so a single matrix product
+        and one comparison produce the full result.
+        :param tests: A list of n linear tests
+        :param assignments: An (m, k) array of values, columns ordered according to var_order
+        :param var_order: The variables corresponding to the columns of assignments
+        :return numpy.ndarray: An (n, m) boolean array of evaluation results
+        """
+        var_order = tuple(var_order)
+        coefficients = numpy.empty((len(tests), len(var_order)), dtype=numpy.float64)
+        rhs = numpy.empty(len(tests), dtype=numpy.float64)
+        for i, linear_test in enumerate(tests):
+            vector, constant = linear_test.operator.to_canonical().prepare_batch(var_order)
+            coefficients[i] = vector
+            rhs[i] = constant
+        assignments = numpy.asarray(assignments, dtype=numpy.float64)
+        return coefficients.dot(assignments.T) <= rhs[:, numpy.newaxis]
+
     def rename(self, translation):
         return LinearTest(self.operator.rename(translation))
 
     def to_canonical(self, child_true, child_false):
         if isinstance(self.operator, (GreaterThan, LessThan)):
-            return LinearTest(self._negated_operator.to_canonical()), child_false, child_true
+            return LinearTest(self.negated.to_canonical()), child_false, child_true
         else:
-            self._operator = self.operator.to_canonical()
-            return self, child_true, child_false
+            return LinearTest(self.operator.to_canonical()), child_true, child_false
 
     def get_valid_branches(self):
         if len(self.operator.variables) > 0:
@@ -513,19 +702,21 @@ class LinearTest(Test):
         return repr(self.operator)
 
     def __hash__(self):
-        return hash(self.operator)
+        return self._hash
 
     def __eq__(self, other):
-        return isinstance(other, LinearTest) and self.operator == other.operator
+        if self is other:
+            return True
+        return isinstance(other, LinearTest) and self._operator == other._operator
 
 
 class BinaryTest(Test):
+    __slots__ = ("_var",)
+
     def __init__(self, var):
         self._var = var
 
-    @property
-    def var(self):
-        return self._var
+    var = property(attrgetter("_var"))
 
     @property
     def variables(self):
@@ -555,3 +746,88 @@ class BinaryTest(Test):
 
     def __eq__(self, other):
         return isinstance(other, BinaryTest) and self.var == other.var
+
+
+class SingularTestTable(object):
+    """
+    Structure-of-arrays registry for singular (single variable) linear tests.
+    Every registered test is reduced to a variable id, a bound direction and a bound value
+    (once for the test itself and once for its negation), so bound updates for all registered
+    tests can be computed with bulk numpy minimum/maximum operations instead of per-test
+    Python dispatch. The scalar LinearTest.update_bounds API remains available.
+    """
+
+    def __init__(self):
+        self._var_ids = dict()
+        self._rows = []
+        self._test_rows = dict()
+        self._arrays = None
+
+    def __len__(self):
+        return len(self._rows)
+
+    def variable_id(self, var):
+        return self._var_ids.get(var)
+
+    def add(self, test):
+        """
+        Registers the given singular test and returns its row index
+        :type test: LinearTest
+        :rtype: int
+        """
+        if test in self._test_rows:
+            return self._test_rows[test]
+        if len(test.variables) != 1:
+            raise RuntimeError("Test does not have exactly one variable (it has {})".format(test.variables))
+        var = test.variables[0]
+        var_id = self._var_ids.setdefault(var, len(self._var_ids))
+        row = []
+        for branch in (True, False):
+            lb, ub = test.update_bounds(var, None, None, test=branch)
+            if ub != sympy.oo:
+                row += [True, float(ub)]
+            else:
+                row += [False, float(lb)]
+        index = len(self._rows)
+        self._rows.append((var_id,) + tuple(row))
+        self._test_rows[test] = index
+        self._arrays = None
+        return index
+
+    def _get_arrays(self):
+        if self._arrays is None:
+            rows = self._rows
+            self._arrays = (
+                numpy.array([r[0] for r in rows], dtype=numpy.int32),
+                numpy.array([r[1] for r in rows], dtype=bool),
+                numpy.array([r[2] for r in rows], dtype=numpy.float64),
+                numpy.array([r[3] for r in rows], dtype=bool),
+                numpy.array([r[4] for r in rows], dtype=numpy.float64),
+            )
+        return self._arrays
+
+    def update_bounds_bulk(self, var, lb, ub, mask=None, test=True):
+        """
+        Updates per-row lower and upper bounds for the given variable in one vectorized pass
+        :param var: The variable whose bounds to update
+        :param lb: Scalar or per-row array of lower bounds
+        :param ub: Scalar or per-row array of upper bounds
+        :param mask: Optional boolean array selecting the rows to apply
+        :param test: Whether to apply the tests themselves (True) or their negations (False)
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray]
+        """
+        count = len(self._rows)
+        lb = numpy.full(count, lb, dtype=numpy.float64) if numpy.isscalar(lb) else numpy.asarray(lb, dtype=numpy.float64)
+        ub = numpy.full(count, ub, dtype=numpy.float64) if numpy.isscalar(ub) else numpy.asarray(ub, dtype=numpy.float64)
+        var_id = self._var_ids.get(var)
+        if var_id is None:
+            return lb, ub
+        var_ids, upper_t, values_t, upper_f, values_f = self._get_arrays()
+        is_upper = upper_t if test else upper_f
+        values = values_t if test else values_f
+        selected = var_ids == var_id
+        if mask is not None:
+            selected = selected & mask
+        new_ub = numpy.where(selected & is_upper, numpy.minimum(ub, values), ub)
+        new_lb = numpy.where(selected & ~is_upper, numpy.maximum(lb, values), lb)
+        return new_lb, new_ub
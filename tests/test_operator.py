@@ -1,4 +1,5 @@
 import unittest
+import numpy as np
 import sympy as sym
 
 from pyxadd import test
@@ -20,3 +21,23 @@ class OperatorTest(unittest.TestCase):
         self.assertEquals(1, operator_substituted.coefficient("x"))
         self.assertEquals(-2, operator_substituted.coefficient("b"))
         self.assertEquals(-1, operator_substituted.rhs)
+
+    def test_evaluate_batch(self):
+        operator = test.Operator.compile(sym.S("x + 2*y"), "<=", sym.S("5"))
+        assignments = np.array([[1, 1], [2, 2], [5, 0], [6, 0]], dtype=np.float64)
+        results = operator.evaluate_batch(assignments, ["x", "y"])
+        expected = [operator.evaluate({"x": a[0], "y": a[1]}) for a in assignments]
+        self.assertEquals(expected, list(results))
+
+    def test_singular_test_table(self):
+        tests = [test.LinearTest("x", "<=", "3"), test.LinearTest("x", ">", "5"),
+                 test.LinearTest("-2*x", "<", "4"), test.LinearTest("y", ">=", "1")]
+        table = test.SingularTestTable()
+        for singular_test in tests:
+            table.add(singular_test)
+        for branch in (True, False):
+            lb, ub = table.update_bounds_bulk("x", -100, 100, test=branch)
+            for i, singular_test in enumerate(tests):
+                expected = (-100, 100) if "x" not in singular_test.variables \
+                    else singular_test.update_bounds("x", -100, 100, test=branch)
+                self.assertEquals(tuple(expected), (lb[i], ub[i]))